@@ -29,9 +29,7 @@ def auto_ownership_simulate(households,
 
     estimator = estimation.manager.begin_estimation('auto_ownership')
 
-    model_spec = simulate.read_model_spec(file_name=model_settings['SPEC'])
-    coefficients_df = simulate.read_model_coefficients(model_settings)
-    model_spec = simulate.eval_coefficients(model_spec, coefficients_df, estimator)
+    model_spec, coefficients_df = simulate.get_evaluated_spec(model_settings, estimator, return_coefficients=True)
 
     nest_spec = config.get_logit_model_settings(model_settings)
     constants = config.get_model_constants(model_settings)
@@ -65,7 +63,11 @@ def auto_ownership_simulate(households,
     households = households.to_frame()
 
     # no need to reindex as we used all households
-    households['auto_ownership'] = choices
+    # (and skip index alignment entirely when choices are already in households order)
+    if choices.index.equals(households.index):
+        households['auto_ownership'] = choices.values
+    else:
+        households['auto_ownership'] = choices
 
     pipeline.replace_table("households", households)
 
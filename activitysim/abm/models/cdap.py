@@ -1,7 +1,9 @@
 # ActivitySim
 # See full license in LICENSE.txt.
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
 
 from activitysim.core import simulate
@@ -36,8 +38,12 @@ def cdap_simulate(persons_merged, persons, households,
     cdap_indiv_spec = simulate.read_model_spec(file_name=model_settings['INDIV_AND_HHSIZE1_SPEC'])
 
     # Rules and coefficients for generating interaction specs for different household sizes
+    # read only the columns preprocess_interaction_coefficients uses, with explicit dtypes (no type inference)
+    interaction_coefficients_dtypes = {'activity': str, 'interaction_ptypes': str, 'coefficient': np.float64}
     cdap_interaction_coefficients = \
-        pd.read_csv(config.config_file_path('cdap_interaction_coefficients.csv'), comment='#')
+        pd.read_csv(config.config_file_path('cdap_interaction_coefficients.csv'), comment='#',
+                    usecols=list(interaction_coefficients_dtypes.keys()),
+                    dtype=interaction_coefficients_dtypes)
 
     """
     spec to compute/specify the relative proportions of each activity (M, N, H)
@@ -56,16 +62,40 @@ def cdap_simulate(persons_merged, persons, households,
     cdap_interaction_coefficients = \
         cdap.preprocess_interaction_coefficients(cdap_interaction_coefficients)
 
-    # specs are built just-in-time on demand and cached as injectables
-    # prebuilding here allows us to write them to the output directory
+    estimator = estimation.manager.begin_estimation('cdap')
+
+    write_spec_csv = inject.get_injectable('locutor', False)
+
+    # specs are built just-in-time on demand (in run_cdap) and cached as injectables
+    # prebuilding them all here allows us to write them to the output directory
     # (also when multiprocessing locutor might not see all household sizes)
-    logger.info("Pre-building cdap specs")
-    for hhsize in range(2, cdap.MAX_HHSIZE + 1):
-        spec = cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize, cache=True)
-        if inject.get_injectable('locutor', False):
-            spec.to_csv(config.output_file_path('cdap_spec_%s.csv' % hhsize), index=True)
+    # and ensures they are cached for the estimator
+    if estimator or write_spec_csv:
+        hhsizes = range(2, cdap.MAX_HHSIZE + 1)
+    else:
+        # otherwise we only need specs for the household sizes actually present
+        hhsizes = persons_merged[cdap._hh_size_].clip(upper=cdap.MAX_HHSIZE).unique()
+        hhsizes = sorted(hhsize for hhsize in hhsizes if hhsize >= 2)
+
+    if model_settings.get('USE_PARALLEL_SPEC_BUILD', False):
+        # specs for different hhsizes are independent, so build them in worker processes
+        cdap.build_cdap_specs_parallel(cdap_interaction_coefficients, hhsizes)
+
+    if estimator or write_spec_csv:
+        logger.info("Pre-building cdap specs for hhsizes %s" % (list(hhsizes),))
+        # write spec csv files on a worker thread so writes overlap building the next spec
+        with ThreadPoolExecutor(max_workers=1) as io_pool:
+            spec_writes = []
+            for hhsize in hhsizes:
+                spec = cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize, cache=True)
+                if write_spec_csv:
+                    spec_writes.append(
+                        io_pool.submit(spec.to_csv, config.output_file_path('cdap_spec_%s.csv' % hhsize),
+                                       index=True))
+            # re-raise any write errors
+            for spec_write in spec_writes:
+                spec_write.result()
 
-    estimator = estimation.manager.begin_estimation('cdap')
     if estimator:
         estimator.write_model_settings(model_settings, 'cdap.yaml')
         estimator.write_spec(model_settings, tag='INDIV_AND_HHSIZE1_SPEC')
@@ -97,8 +127,12 @@ def cdap_simulate(persons_merged, persons, households,
     # - assign results to persons table and annotate
     persons = persons.to_frame()
 
-    choices = choices.reindex(persons.index)
-    persons['cdap_activity'] = choices
+    # scatter choices into persons by position (persons not in choosers get nan)
+    choice_positions = persons.index.get_indexer(choices.index)
+    valid = choice_positions >= 0
+    cdap_activity = np.full(len(persons.index), np.nan, dtype=object)
+    cdap_activity[choice_positions[valid]] = choices.values[valid]
+    persons['cdap_activity'] = cdap_activity
 
     expressions.assign_columns(
         df=persons,
@@ -116,5 +150,10 @@ def cdap_simulate(persons_merged, persons, households,
     pipeline.replace_table("households", households)
 
     tracing.print_summary('cdap_activity', persons.cdap_activity, value_counts=True)
-    logger.info("cdap crosstabs:\n%s" %
-                pd.crosstab(persons.ptype, persons.cdap_activity, margins=True))
+    # don't pay for the crosstab if it won't be logged
+    if logger.isEnabledFor(logging.INFO):
+        # crosstab on categoricals groups on integer codes rather than hashing object values
+        logger.info("cdap crosstabs:\n%s",
+                    pd.crosstab(persons.ptype.astype('category'),
+                                persons.cdap_activity.astype('category'),
+                                margins=True))
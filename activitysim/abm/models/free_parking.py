@@ -2,6 +2,8 @@
 # See full license in LICENSE.txt.
 import logging
 
+import numpy as np
+
 from activitysim.core import tracing
 from activitysim.core import config
 from activitysim.core import pipeline
@@ -26,8 +28,10 @@ def free_parking(
     trace_label = 'free_parking'
     model_settings_file_name = 'free_parking.yaml'
 
+    # only persons with a workplace location are choosers
+    # (filter on ndarray mask rather than building an intermediate boolean Series)
     choosers = persons_merged.to_frame()
-    choosers = choosers[choosers.workplace_taz > -1]
+    choosers = choosers.loc[choosers.workplace_taz.values > -1]
     logger.info("Running %s with %d persons", trace_label, len(choosers))
 
     model_settings = config.read_model_settings(model_settings_file_name)
@@ -39,19 +43,14 @@ def free_parking(
     preprocessor_settings = model_settings.get('preprocessor', None)
     if preprocessor_settings:
 
-        locals_d = {}
-        if constants is not None:
-            locals_d.update(constants)
-
+        # compute_columns copies locals_dict into its own eval locals, so no need to copy constants
         expressions.assign_columns(
             df=choosers,
             model_settings=preprocessor_settings,
-            locals_dict=locals_d,
+            locals_dict=constants or {},
             trace_label=trace_label)
 
-    model_spec = simulate.read_model_spec(file_name=model_settings['SPEC'])
-    coefficients_df = simulate.read_model_coefficients(model_settings)
-    model_spec = simulate.eval_coefficients(model_spec, coefficients_df, estimator)
+    model_spec, coefficients_df = simulate.get_evaluated_spec(model_settings, estimator, return_coefficients=True)
 
     nest_spec = config.get_logit_model_settings(model_settings)
 
@@ -81,7 +80,14 @@ def free_parking(
         estimator.end_estimation()
 
     persons = persons.to_frame()
-    persons['free_parking_at_work'] = choices.reindex(persons.index).fillna(0).astype(bool)
+
+    # scatter choices into a single bool array (non-choosers don't have free parking)
+    # rather than allocating intermediates with reindex/fillna/astype
+    choice_positions = persons.index.get_indexer(choices.index)
+    valid = choice_positions >= 0
+    free_parking_at_work = np.zeros(len(persons.index), dtype=np.bool_)
+    free_parking_at_work[choice_positions[valid]] = choices.values[valid]
+    persons['free_parking_at_work'] = free_parking_at_work
 
     pipeline.replace_table("persons", persons)
 
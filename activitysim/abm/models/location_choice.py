@@ -4,6 +4,7 @@ import logging
 
 # import multiprocessing
 
+import numpy as np
 import pandas as pd
 
 from activitysim.core import tracing
@@ -171,6 +172,7 @@ def run_location_logsums(
         skim_dict, skim_stack,
         location_sample_df,
         model_settings,
+        logsum_settings,
         chunk_size, trace_hh_id, trace_label):
     """
     add logsum column to existing location_sample table
@@ -195,15 +197,15 @@ def run_location_logsums(
 
     assert not location_sample_df.empty
 
-    logsum_settings = config.read_model_settings(model_settings['LOGSUM_SETTINGS'])
-
     # FIXME - MEMORY HACK - only include columns actually used in spec
     persons_merged_df = \
         logsum.filter_chooser_columns(persons_merged_df, logsum_settings, model_settings)
 
     logger.info("Running %s with %s rows" % (trace_label, len(location_sample_df.index)))
 
-    choosers = location_sample_df.join(persons_merged_df, how='left')
+    # persons_merged_df has a unique index, so a reindex gather is a cheaper left join than df.join
+    chooser_attributes = persons_merged_df.reindex(location_sample_df.index)
+    choosers = pd.concat([location_sample_df, chooser_attributes], axis=1)
 
     tour_purpose = model_settings['LOGSUM_TOUR_PURPOSE']
     if isinstance(tour_purpose, dict):
@@ -258,9 +260,10 @@ def run_location_simulate(
 
     # alternatives are pre-sampled and annotated with logsums and pick_count
     # but we have to merge additional alt columns into alt sample list
-    alternatives = \
-        pd.merge(location_sample_df, dest_size_terms,
-                 left_on=alt_dest_col_name, right_index=True, how="left")
+    # dest_size_terms has one row per zone, so a reindex gather is a much cheaper left join than pd.merge
+    alt_dest_size_terms = dest_size_terms.reindex(location_sample_df[alt_dest_col_name].values)
+    alt_dest_size_terms.index = location_sample_df.index
+    alternatives = pd.concat([location_sample_df, alt_dest_size_terms], axis=1)
 
     logger.info("Running %s with %d persons" % (trace_label, len(choosers)))
 
@@ -317,7 +320,9 @@ def run_location_choice(
         want_sample_table,
         estimator,
         model_settings,
-        chunk_size, trace_hh_id, trace_label
+        logsum_settings,
+        chunk_size, trace_hh_id, trace_label,
+        segment_positions=None
         ):
     """
     Run the three-part location choice algorithm to generate a location choice for each chooser
@@ -336,9 +341,14 @@ def run_location_choice(
     want_sample_table : boolean
     estimator: Estimator object
     model_settings : dict
+    logsum_settings : dict
+        settings for the logsum model (read once by caller rather than for every segment)
     chunk_size : int
     trace_hh_id : int
     trace_label : str
+    segment_positions : dict or None
+        row positions in persons_merged_df of the choosers in each segment, keyed by segment id
+        (as returned by groupby indices) - computed here if None
 
     Returns
     -------
@@ -354,11 +364,21 @@ def run_location_choice(
     # maps segment names to compact (integer) ids
     segment_ids = model_settings['SEGMENT_IDS']
 
-    choices_list = []
+    # scatter segment choices into arrays aligned with persons_merged_df
+    # rather than accumulating per-segment dataframes to concat
+    num_choosers = len(persons_merged_df.index)
+    chosen = np.zeros(num_choosers, dtype=np.bool_)
+    choices = np.zeros(num_choosers, dtype=np.int64)
+    logsums = np.full(num_choosers, np.nan) if want_logsums else None
+
+    # row positions of choosers in each segment (in a single pass rather than a mask per segment)
+    if segment_positions is None:
+        segment_positions = persons_merged_df.groupby(chooser_segment_column, sort=False).indices
+
     sample_list = []
     for segment_name, segment_id in segment_ids.items():
 
-        choosers = persons_merged_df[persons_merged_df[chooser_segment_column] == segment_id]
+        choosers = persons_merged_df.take(segment_positions.get(segment_id, []))
 
         # size_term and shadow price adjustment - one row per zone
         dest_size_terms = shadow_price_calculator.dest_size_terms(segment_name)
@@ -387,6 +407,7 @@ def run_location_choice(
                 skim_dict, skim_stack,
                 location_sample_df,
                 model_settings,
+                logsum_settings,
                 chunk_size,
                 trace_hh_id,
                 tracing.extend_trace_label(trace_label, 'logsums.%s' % segment_name))
@@ -411,20 +432,28 @@ def run_location_choice(
                                                             column_names=model_settings['DEST_CHOICE_COLUMN_NAME'])
             estimator.write_override_choices(choices_df.choice)
 
-        choices_list.append(choices_df)
+        positions = persons_merged_df.index.get_indexer(choices_df.index)
+        if not (positions >= 0).all():
+            raise RuntimeError("run_location_choice segment '%s' choices not in persons_merged" %
+                               (segment_name, ))
+        chosen[positions] = True
+        choices[positions] = choices_df['choice'].values
+        if want_logsums:
+            logsums[positions] = choices_df['logsum'].values
 
         if want_sample_table:
             # FIXME - sample_table
-            location_sample_df.set_index(model_settings['ALT_DEST_COL_NAME'],
-                                         append=True, inplace=True)
             sample_list.append(location_sample_df)
 
+        # release this segment's dataframes before collecting, rather than when the next segment rebinds them
         # FIXME - want to do this here?
-        del location_sample_df
+        del choosers, dest_size_terms, location_sample_df, choices_df
         force_garbage_collect()
 
-    if len(choices_list) > 0:
-        choices_df = pd.concat(choices_list)
+    if chosen.any():
+        choices_df = pd.DataFrame({'choice': choices[chosen]}, index=persons_merged_df.index[chosen])
+        if want_logsums:
+            choices_df['logsum'] = logsums[chosen]
     else:
         # this will only happen with small samples (e.g. singleton) with no (e.g.) school segs
         logger.warning("%s no choices", trace_label)
@@ -432,6 +461,8 @@ def run_location_choice(
 
     if len(sample_list) > 0:
         save_sample_df = pd.concat(sample_list)
+        # append alt dest to the index once, rather than per segment
+        save_sample_df.set_index(model_settings['ALT_DEST_COL_NAME'], append=True, inplace=True)
     else:
         # this could happen either with small samples as above, or if no saved sample desired
         save_sample_df = None
@@ -484,18 +515,33 @@ def iterate_location_choice(
     sample_table_name = model_settings.get('DEST_CHOICE_SAMPLE_TABLE_NAME')
     want_sample_table = config.setting('want_dest_choice_sample_tables') and sample_table_name is not None
 
+    # only keep the columns used by the sample, logsum, and simulate steps (and the segment column)
+    # so that filtering out non-choosers copies as little data as possible
+    logsum_settings = config.read_model_settings(model_settings['LOGSUM_SETTINGS'])
+    chooser_columns = set(model_settings['SIMULATE_CHOOSER_COLUMNS'])
+    chooser_columns.update(logsum_settings.get('LOGSUM_CHOOSER_COLUMNS', []))
+    if 'CHOOSER_ORIG_COL_NAME' in model_settings:
+        chooser_columns.add(model_settings['CHOOSER_ORIG_COL_NAME'])
+    chooser_columns.add(chooser_segment_column)
+
     persons_merged_df = persons_merged.to_frame()
 
-    persons_merged_df = persons_merged_df[persons_merged[chooser_filter_column]]
+    chooser_columns = [c for c in persons_merged_df.columns if c in chooser_columns]
+    persons_merged_df = persons_merged_df.loc[persons_merged_df[chooser_filter_column].values, chooser_columns]
 
     persons_merged_df.sort_index(inplace=True)  # interaction_sample expects chooser index to be monotonic increasing
 
     spc = shadow_pricing.load_shadow_price_calculator(model_settings)
     max_iterations = spc.max_iterations
     assert not (spc.use_shadow_pricing and estimator)
+    # without shadow pricing there is nothing to iterate on (ShadowPriceCalculator sets max_iterations to 1)
+    assert spc.use_shadow_pricing or max_iterations == 1
 
     logger.debug("%s max_iterations: %s" % (trace_label, max_iterations))
 
+    # chooser segments don't change between iterations, so only partition choosers once
+    segment_positions = persons_merged_df.groupby(chooser_segment_column, sort=False).indices
+
     for iteration in range(1, max_iterations + 1):
 
         if spc.use_shadow_pricing and iteration > 1:
@@ -509,17 +555,25 @@ def iterate_location_choice(
             want_sample_table=want_sample_table,
             estimator=estimator,
             model_settings=model_settings,
+            logsum_settings=logsum_settings,
             chunk_size=chunk_size,
             trace_hh_id=trace_hh_id,
-            trace_label=tracing.extend_trace_label(trace_label, 'i%s' % iteration))
+            trace_label=tracing.extend_trace_label(trace_label, 'i%s' % iteration),
+            segment_positions=segment_positions)
 
         # choices_df is a pandas DataFrame with columns 'choice' and (optionally) 'logsum'
         if choices_df is None:
             break
 
+        # choices_df rows are in persons_merged_df order, so usually (when every chooser is in
+        # one of the segments) there is nothing to realign
+        segment_ids = persons_merged_df[chooser_segment_column]
+        if not choices_df.index.equals(segment_ids.index):
+            segment_ids = segment_ids.reindex(choices_df.index)
+
         spc.set_choices(
             choices=choices_df['choice'],
-            segment_ids=persons_merged_df[chooser_segment_column].reindex(choices_df.index))
+            segment_ids=segment_ids)
 
         if locutor:
             spc.write_trace_files(iteration)
@@ -535,20 +589,22 @@ def iterate_location_choice(
         if 'MODELED_SIZE_TABLE' in model_settings:
             inject.add_table(model_settings['MODELED_SIZE_TABLE'], spc.modeled_size)
 
-    persons_df = persons.to_frame()
-
     # add the choice values to the dest_choice_column in persons dataframe
     # We only chose school locations for the subset of persons who go to school
     # so we backfill the empty choices with -1 to code as no school location
     # names for location choice and (optional) logsums columns
     NO_DEST_TAZ = -1
-    persons_df[dest_choice_column_name] = \
-        choices_df['choice'].reindex(persons_df.index).fillna(NO_DEST_TAZ).astype(int)
+    choice_positions = persons.index.get_indexer(choices_df.index)
+    valid = choice_positions >= 0
+    dest_choices = np.full(len(persons.index), NO_DEST_TAZ, dtype=int)
+    dest_choices[choice_positions[valid]] = choices_df['choice'].values[valid]
+    choice_columns = {dest_choice_column_name: dest_choices}
 
     # add the dest_choice_logsum column to persons dataframe
     if logsum_column_name:
-        persons_df[logsum_column_name] = \
-            choices_df['logsum'].reindex(persons_df.index).astype('float')
+        dest_logsums = np.full(len(persons.index), np.nan)
+        dest_logsums[choice_positions[valid]] = choices_df['logsum'].values[valid]
+        choice_columns[logsum_column_name] = dest_logsums
 
     if save_sample_df is not None:
         # might be None for tiny samples even if sample_table_name was specified
@@ -559,18 +615,22 @@ def iterate_location_choice(
         pipeline.extend_table(sample_table_name, save_sample_df)
 
     # - annotate persons table
+    persons_df = persons.to_frame()
+    for column_name, column in choice_columns.items():
+        persons_df[column_name] = column
+
     if 'annotate_persons' in model_settings:
         expressions.assign_columns(
             df=persons_df,
             model_settings=model_settings.get('annotate_persons'),
             trace_label=tracing.extend_trace_label(trace_label, 'annotate_persons'))
 
-        pipeline.replace_table("persons", persons_df)
+    pipeline.replace_table("persons", persons_df)
 
-        if trace_hh_id:
-            tracing.trace_df(persons_df,
-                             label=trace_label,
-                             warn_if_empty=True)
+    if trace_hh_id:
+        tracing.trace_df(persons_df,
+                         label=trace_label,
+                         warn_if_empty=True)
 
     # - annotate households table
     if 'annotate_households' in model_settings:
@@ -590,8 +650,6 @@ def iterate_location_choice(
     if logsum_column_name:
         tracing.print_summary(logsum_column_name, choices_df['logsum'], value_counts=True)
 
-    return persons_df
-
 
 @inject.step()
 def workplace_location(
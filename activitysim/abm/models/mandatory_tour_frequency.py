@@ -2,6 +2,7 @@
 # See full license in LICENSE.txt.
 import logging
 
+import numpy as np
 import pandas as pd
 
 from activitysim.core import simulate
@@ -53,7 +54,7 @@ def mandatory_tour_frequency(persons_merged,
 
     choosers = persons_merged.to_frame()
     # filter based on results of CDAP
-    choosers = choosers[choosers.cdap_activity == 'M']
+    choosers = choosers.loc[choosers.cdap_activity.values == 'M']
     logger.info("Running mandatory_tour_frequency with %d persons", len(choosers))
 
     # - if no mandatory tours
@@ -114,7 +115,10 @@ def mandatory_tour_frequency(persons_merged,
     the same as got non_mandatory_tours except trip types are "work" and "school"
     """
     alternatives = simulate.read_model_alts('mandatory_tour_frequency_alternatives.csv', set_index='alt')
-    choosers['mandatory_tour_frequency'] = choices.reindex(choosers.index)
+    if choices.index.equals(choosers.index):
+        choosers['mandatory_tour_frequency'] = choices.values
+    else:
+        choosers['mandatory_tour_frequency'] = choices.reindex(choosers.index)
 
     mandatory_tours = process_mandatory_tours(
         persons=choosers,
@@ -128,8 +132,13 @@ def mandatory_tour_frequency(persons_merged,
     # - annotate persons
     persons = inject.get_table('persons').to_frame()
 
-    # need to reindex as we only handled persons with cdap_activity == 'M'
-    persons['mandatory_tour_frequency'] = choices.reindex(persons.index).fillna('').astype(str)
+    # only persons with cdap_activity == 'M' were choosers, everyone else gets an empty string
+    # (persons is saved with pipeline.replace_table, as in location choice)
+    choice_positions = persons.index.get_indexer(choices.index)
+    valid = choice_positions >= 0
+    mandatory_tour_frequency = np.full(len(persons.index), '', dtype=object)
+    mandatory_tour_frequency[choice_positions[valid]] = choices.values[valid].astype(str)
+    persons['mandatory_tour_frequency'] = mandatory_tour_frequency
 
     expressions.assign_columns(
         df=persons,
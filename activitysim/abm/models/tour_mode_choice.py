@@ -93,8 +93,13 @@ def tour_mode_choice_simulate(tours, persons_merged,
     tracing.print_summary('tour_types',
                           primary_tours.tour_type, value_counts=True)
 
-    primary_tours_merged = pd.merge(primary_tours, persons_merged, left_on='person_id',
-                                    right_index=True, how='left', suffixes=('', '_r'))
+    # persons_merged has a unique person_id index, so a reindex gather is a cheaper many-to-one
+    # left join than pd.merge (same result, with duplicate person columns suffixed '_r')
+    tour_persons = persons_merged.reindex(primary_tours.person_id.values)
+    tour_persons.index = primary_tours.index
+    tour_persons.columns = [c + '_r' if c in primary_tours else c for c in tour_persons.columns]
+    primary_tours_merged = pd.concat([primary_tours, tour_persons], axis=1)
+    del tour_persons
 
     # setup skim keys
     orig_col_name = 'TAZ'
@@ -131,8 +136,20 @@ def tour_mode_choice_simulate(tours, persons_merged,
         estimator.write_model_settings(model_settings, model_settings_file_name)
         # FIXME run_tour_mode_choice_simulate writes choosers post-annotation
 
-    choices_list = []
-    for tour_type, segment in primary_tours_merged.groupby('tour_type'):
+    # tour_type segments partition the tours, so scatter segment choices into preallocated
+    # columns by position rather than accumulating per-segment dataframes to concat
+    num_tours = len(primary_tours_merged.index)
+    chosen = np.zeros(num_tours, dtype=np.bool_)
+    tour_modes = np.empty(num_tours, dtype=object)
+    logsums = np.full(num_tours, np.nan) if logsum_column_name else None
+
+    # row positions of the tours of each tour_type (in a single pass rather than a groupby per segment)
+    segment_positions = primary_tours_merged.groupby('tour_type').indices
+
+    for tour_type in sorted(segment_positions):
+
+        # run_tour_mode_choice_simulate annotates choosers, so we want a copy rather than a view
+        segment = primary_tours_merged.take(segment_positions[tour_type])
 
         logger.info("tour_mode_choice_simulate tour_type '%s' (%s tours)" %
                     (tour_type, len(segment.index), ))
@@ -155,12 +172,22 @@ def tour_mode_choice_simulate(tours, persons_merged,
         tracing.print_summary('tour_mode_choice_simulate %s choices_df' % tour_type,
                               choices_df.tour_mode, value_counts=True)
 
-        choices_list.append(choices_df)
+        # mode_choice_simulate returns choices in segment order, so we can scatter them by segment position
+        if not choices_df.index.equals(segment.index):
+            raise RuntimeError("tour_mode_choice_simulate tour_type '%s' choices not in segment order" %
+                               (tour_type, ))
+        positions = segment_positions[tour_type]
+        chosen[positions] = True
+        tour_modes[positions] = choices_df[mode_column_name].values
+        if logsum_column_name:
+            logsums[positions] = choices_df[logsum_column_name].values
 
         # FIXME - force garbage collection
         force_garbage_collect()
 
-    choices_df = pd.concat(choices_list)
+    choices_df = pd.DataFrame({mode_column_name: tour_modes[chosen]}, index=primary_tours_merged.index[chosen])
+    if logsum_column_name:
+        choices_df[logsum_column_name] = logsums[chosen]
 
     if estimator:
         estimator.write_choices(choices_df.tour_mode)
@@ -171,14 +198,11 @@ def tour_mode_choice_simulate(tours, persons_merged,
     tracing.print_summary('tour_mode_choice_simulate all tour type choices',
                           choices_df.tour_mode, value_counts=True)
 
-    # so we can trace with annotations
+    # primary_tours is still an unannotated copy of all the tours (atwork subtours aren't created yet)
+    # so we can add the mode choice cols to it and use it to replace tours, rather than copying tours again
     assign_in_place(primary_tours, choices_df)
 
-    # but only keep mode choice col
-    all_tours = tours.to_frame()
-    assign_in_place(all_tours, choices_df)
-
-    pipeline.replace_table("tours", all_tours)
+    pipeline.replace_table("tours", primary_tours)
 
     if trace_hh_id:
         tracing.trace_df(primary_tours,
@@ -2,12 +2,15 @@
 # See full license in LICENSE.txt.
 import logging
 import itertools
+import hashlib
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
 from zbox import toolz as tz, gen
 
+from activitysim import __version__
 from activitysim.core import simulate
 from activitysim.core import pipeline
 
@@ -278,6 +281,74 @@ def cache_spec(hhsize, spec):
     inject.add_injectable(spec_name, spec)
 
 
+def spec_cache_file_path(interaction_coefficients, hhsize):
+    """
+    Return path of the disk-cached spec for hhsize, or None if cdap_spec_cache_dir is not set.
+
+    The file name includes a hash of the interaction_coefficients, the activitysim version and
+    MAX_HHSIZE, so changes to the coefficients file or to build_cdap_spec will not pick up stale
+    specs built from earlier coefficients or code.
+    """
+
+    spec_cache_dir = config.setting('cdap_spec_cache_dir')
+    if not spec_cache_dir:
+        return None
+
+    cache_key = '%s_%s_%s' % (__version__, MAX_HHSIZE, hhsize)
+    coefficients_hash = \
+        hashlib.blake2b(pd.util.hash_pandas_object(interaction_coefficients).values.tobytes() +
+                        cache_key.encode(), digest_size=16).hexdigest()
+
+    return os.path.join(spec_cache_dir, 'cdap_spec_%s_%s.csv' % (hhsize, coefficients_hash))
+
+
+def read_spec_cache(spec_cache_path, hhsize):
+    """
+    Return the disk-cached spec for hhsize, or None if there is no usable cached spec.
+
+    The cache dir is user-configured, so specs are stored as csv rather than pickled, and we
+    check that the cached spec has the alternative columns and numeric utilities of a spec
+    built for hhsize before trusting it (otherwise the spec is simply rebuilt).
+    """
+
+    if spec_cache_path is None or not os.path.isfile(spec_cache_path):
+        return None
+
+    logger.info("build_cdap_spec reading cached spec from %s", spec_cache_path)
+
+    expression_name = "Expression"
+    alternatives = [''.join(tup) for tup in itertools.product('HMN', repeat=hhsize)]
+
+    try:
+        spec = pd.read_csv(spec_cache_path, index_col=expression_name,
+                           dtype={expression_name: str}, float_precision='round_trip')
+    except (ValueError, pd.errors.ParserError) as e:
+        logger.warning("build_cdap_spec ignoring unreadable cached spec %s: %s", spec_cache_path, e)
+        return None
+
+    if list(spec.columns) != alternatives \
+            or not spec.index.is_unique \
+            or not all(pd.api.types.is_numeric_dtype(dtype) for dtype in spec.dtypes):
+        logger.warning("build_cdap_spec ignoring cached spec %s that does not match hhsize %s",
+                       spec_cache_path, hhsize)
+        return None
+
+    return spec
+
+
+def write_spec_cache(spec_cache_path, spec):
+
+    if spec_cache_path is None:
+        return
+
+    logger.info("build_cdap_spec writing cached spec to %s", spec_cache_path)
+
+    # write to temp file and rename so that (e.g. multiprocessing) readers never see a partial file
+    temp_path = '%s.%s.tmp' % (spec_cache_path, os.getpid())
+    spec.to_csv(temp_path, index=True)
+    os.replace(temp_path, spec_cache_path)
+
+
 def build_cdap_spec(interaction_coefficients, hhsize,
                     trace_spec=False, trace_label=None, cache=True):
     """
@@ -339,6 +410,12 @@ def build_cdap_spec(interaction_coefficients, hhsize,
         if spec is not None:
             return spec
 
+        spec_cache_path = spec_cache_file_path(interaction_coefficients, hhsize)
+        spec = read_spec_cache(spec_cache_path, hhsize)
+        if spec is not None:
+            cache_spec(hhsize, spec)
+            return spec
+
     expression_name = "Expression"
 
     # generate a list of activity pattern alternatives for this hhsize
@@ -452,12 +529,58 @@ def build_cdap_spec(interaction_coefficients, hhsize,
 
     if cache:
         cache_spec(hhsize, spec)
+        write_spec_cache(spec_cache_path, spec)
 
     t0 = tracing.print_elapsed_time("build_cdap_spec hh_size %s" % hhsize, t0)
 
     return spec
 
 
+def build_cdap_specs_parallel(interaction_coefficients, hhsizes, max_workers=None):
+    """
+    Build and cache specs for hhsizes in a pool of worker processes.
+
+    Specs already cached (as injectables or in cdap_spec_cache_dir) are not rebuilt.
+    Workers build with cache=False and the specs are cached in the calling process,
+    so subsequent build_cdap_spec(..., cache=True) calls return them as usual.
+
+    Parameters
+    ----------
+    interaction_coefficients : pandas.DataFrame
+        preprocessed interaction coefficients
+    hhsizes : iterable of int
+        household sizes for which specs should be built
+    max_workers : int or None
+        number of worker processes (defaults to min(4, number of specs to build))
+    """
+
+    hhsizes_to_build = []
+    for hhsize in sorted(set(min(hhsize, MAX_HHSIZE) for hhsize in hhsizes)):
+        if get_cached_spec(hhsize) is not None:
+            continue
+        spec = read_spec_cache(spec_cache_file_path(interaction_coefficients, hhsize), hhsize)
+        if spec is not None:
+            cache_spec(hhsize, spec)
+            continue
+        hhsizes_to_build.append(hhsize)
+
+    if not hhsizes_to_build:
+        return
+
+    max_workers = max_workers or min(4, len(hhsizes_to_build))
+    logger.info("build_cdap_specs_parallel building hhsizes %s with %s workers",
+                hhsizes_to_build, max_workers)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {hhsize: pool.submit(build_cdap_spec, interaction_coefficients, hhsize, cache=False)
+                   for hhsize in hhsizes_to_build}
+
+        for hhsize, future in futures.items():
+            spec = future.result()
+            cache_spec(hhsize, spec)
+            write_spec_cache(spec_cache_file_path(interaction_coefficients, hhsize), spec)
+
+
 def add_interaction_column(choosers, p_tup):
     """
     Add an interaction column in place to choosers, listing the ptypes of the persons in p_tup
@@ -492,24 +615,21 @@ def add_interaction_column(choosers, p_tup):
 
     # Since ptypes are always between 1 and 8, we represent the interaction as an integer (24)
     # rather than as a string ('24')
-    # FIXME - check that coding interactions as integers is in fact faster then coding as strings
 
     if p_tup != tuple(sorted(p_tup)):
         raise RuntimeError("add_interaction_column tuple not sorted" % p_tup)
 
-    # FIXME - this could be made more elegant and efficient
-    # I couldn't figure out a good way to do this in pandas, but we want to do something like:
-    # choosers['p1_p3'] = choosers['ptype_p1'].astype(str) + choosers['ptype_p3'].astype(str)
-
     dest_col = '_'.join(['p%s' % pnum for pnum in p_tup])
 
-    # build a string concatenating the ptypes of the persons in the order they appear in p_tup
-    choosers[dest_col] = choosers[add_pn('ptype', p_tup[0])].astype(str)
-    for pnum in p_tup[1:]:
-        choosers[dest_col] = choosers[dest_col] + choosers[add_pn('ptype', pnum)].astype(str)
+    # sort each household's ptypes into increasing ptype order (row-wise, vectorized)
+    ptypes = choosers[[add_pn('ptype', pnum) for pnum in p_tup]].to_numpy().astype(np.int64)
+    ptypes.sort(axis=1)
+
+    if ((ptypes < 0) | (ptypes > 9)).any():
+        raise RuntimeError("add_interaction_column ptypes must be single digits")
 
-    # sort the list of ptypes so it is in increasing ptype order, then convert to int
-    choosers[dest_col] = choosers[dest_col].apply(lambda x: ''.join(sorted(x))).astype(int)
+    # and combine them as decimal digits (e.g. ptypes 8 and 2 become 28)
+    choosers[dest_col] = ptypes.dot(10 ** np.arange(len(p_tup) - 1, -1, -1))
 
 
 def hh_choosers(indiv_utils, hhsize):
@@ -631,6 +751,10 @@ def household_activity_choices(indiv_utils, interaction_coefficients, hhsize,
 
         choosers = hh_choosers(indiv_utils, hhsize=hhsize)
 
+        # don't bother building spec if there are no households of this size
+        if len(choosers.index) == 0:
+            return pd.Series(dtype='float64')
+
         spec = build_cdap_spec(interaction_coefficients, hhsize,
                                trace_spec=(trace_hh_id in choosers.index),
                                trace_label=trace_label)
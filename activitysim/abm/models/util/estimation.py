@@ -8,13 +8,18 @@ import logging
 
 import yaml
 
+import numpy as np
 import pandas as pd
 
+try:
+    # use the libyaml emitter if pyyaml was built with it
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
 from activitysim.core import config
 from activitysim.core import simulate
 
-from activitysim.core.util import reindex
-
 logger = logging.getLogger('estimation')
 
 ESTIMATION_SETTINGS_FILE_NAME = 'estimation.yaml'
@@ -30,6 +35,7 @@ class Estimator(object):
         self.settings_name = settings_name
         self.estimation_table_recipes = estimation_table_recipes
         self.estimating = True
+        self.output_dir = None
 
         # ensure the output data directory exists
         output_dir = self.data_directory()
@@ -38,14 +44,15 @@ class Estimator(object):
 
         # delete estimation files
         file_type = ('csv', 'yaml')
-        for file_name in os.listdir(output_dir):
-            if file_name.startswith(model_name) and file_name.endswith(file_type):
-                file_path = os.path.join(output_dir, file_name)
-                try:
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
-                except Exception as e:
-                    print(e)
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(model_name) and entry.name.endswith(file_type):
+                    try:
+                        # DirEntry caches the file type from the directory scan, so this doesn't stat
+                        if entry.is_file():
+                            os.unlink(entry.path)
+                    except Exception as e:
+                        print(e)
 
         # FIXME - not required?
         # assert 'override_choices' in self.model_settings, \
@@ -54,6 +61,8 @@ class Estimator(object):
         self.omnibus_tables = self.estimation_table_recipes['omnibus_tables']
         self.omnibus_tables_append_columns = self.estimation_table_recipes['omnibus_tables_append_columns']
         self.tables = {}
+        # names of tables already written to csv (their files were deleted above, so this is all of them)
+        self.tables_written = set()
         self.tables_to_cache = [table_name for tables in self.omnibus_tables.values() for table_name in tables]
         self.alt_id_column_name = None
         self.chooser_id_column_name = None
@@ -105,12 +114,17 @@ class Estimator(object):
         assert self.estimating
         assert self.settings_name is not None
 
-        parent_dir = config.output_file_path('estimation_data_bundle')
+        # every table write asks for this, so only build it once
+        if self.output_dir is None:
+
+            parent_dir = config.output_file_path('estimation_data_bundle')
 
-        if self.settings_name != self.model_name:
-            parent_dir = os.path.join(parent_dir, self.settings_name)
+            if self.settings_name != self.model_name:
+                parent_dir = os.path.join(parent_dir, self.settings_name)
 
-        return os.path.join(parent_dir, self.model_name)
+            self.output_dir = os.path.join(parent_dir, self.model_name)
+
+        return self.output_dir
 
     def file_path(self, table_name, file_type=None):
 
@@ -129,17 +143,18 @@ class Estimator(object):
         def cache_table(df, table_name, append):
             if table_name in self.tables and not append:
                 raise RuntimeError("cache_table %s append=False and table exists" % (table_name,))
-            if table_name in self.tables:
-                self.tables[table_name] = pd.concat([self.tables[table_name], df])
-            else:
-                self.tables[table_name] = df.copy()
+            # accumulate chunks in a list and concat them once in write_omnibus_table
+            self.tables.setdefault(table_name, []).append(df.copy())
 
         def write_table(df, table_name, index, append):
             file_path = self.file_path(table_name, 'csv')
-            file_exists = os.path.isfile(file_path)
+            file_exists = table_name in self.tables_written
             if file_exists and not append:
                 raise RuntimeError("write_table %s append=False and file exists: %s" % (table_name, file_path))
-            df.to_csv(file_path, mode='a', index=index, header=(not file_exists))
+            # wide chooser and alternatives chunks are large, so write through a bigger buffer than the default
+            with open(file_path, mode='a', buffering=1 << 20, newline='') as f:
+                df.to_csv(f, index=index, header=(not file_exists))
+            self.tables_written.add(table_name)
 
         assert self.estimating
 
@@ -171,13 +186,15 @@ class Estimator(object):
             table_names = [t for t in table_names if t in self.tables]
             concat_axis = 1 if omnibus_table in self.omnibus_tables_append_columns else 0
 
-            df = pd.concat([self.tables[t] for t in table_names], axis=concat_axis)
+            df = pd.concat([pd.concat(self.tables[t]) for t in table_names], axis=concat_axis)
 
             file_path = self.file_path(omnibus_table, 'csv')
 
             assert not os.path.isfile(file_path)
 
-            df.sort_index(ascending=True, inplace=True, kind='mergesort')
+            # chunks are usually processed in chooser id order, so the concatenated table is often already sorted
+            if not df.index.is_monotonic_increasing:
+                df.sort_index(ascending=True, inplace=True, kind='mergesort')
             df.to_csv(file_path, mode='a', index=True, header=True)
 
             self.debug('write_omnibus_choosers: %s' % file_path)
@@ -193,7 +210,7 @@ class Estimator(object):
 
         with open(file_path, 'w') as f:
             # write ordered dict as array
-            yaml.dump(d, f)
+            yaml.dump(d, f, Dumper=SafeDumper)
 
         self.debug("estimate.write_dict: %s" % file_path)
 
@@ -221,10 +238,10 @@ class Estimator(object):
         self.write_table(choices, 'override_choices', append=True)
 
     def write_constants(self, constants):
-        self.write_dict(self, constants, 'model_constants')
+        self.write_dict(constants, 'model_constants')
 
     def write_nest_spec(self, nest_spec):
-        self.write_dict(self, nest_spec, 'nest_spec')
+        self.write_dict(nest_spec, 'nest_spec')
 
     def copy_model_settings(self, settings_file_name, tag='model_settings'):
 
@@ -232,7 +249,7 @@ class Estimator(object):
 
         output_path = self.file_path(tag, 'yaml')
 
-        shutil.copy(input_path, output_path)
+        shutil.copyfile(input_path, output_path)
 
     def write_model_settings(self, model_settings, settings_file_name):
 
@@ -266,9 +283,50 @@ class Estimator(object):
             chooser_name = self.chooser_id_column_name
             assert chooser_name in df
 
-        # mergesort is the only stable sort, and we want the expressions to appear in original df column order
+        def reshape_alternatives():
+            # if every chooser has the same alternatives, in the same order, in a contiguous block of rows
+            # (e.g. unsampled alternatives) the unstacked table is just a transpose of each chooser's block
+            chooser_ids = df[chooser_name].values
+            alt_ids = df[alt_id_name].values
+            variables = [c for c in df.columns if c not in (chooser_name, alt_id_name)]
+
+            if len(df.index) == 0 or len(variables) == 0:
+                return None
+
+            num_alts = np.argmax(chooser_ids != chooser_ids[0]) or len(chooser_ids)
+            if len(chooser_ids) % num_alts != 0:
+                return None
+            num_choosers = len(chooser_ids) // num_alts
+
+            chooser_blocks = chooser_ids.reshape(num_choosers, num_alts)
+            alt_blocks = alt_ids.reshape(num_choosers, num_alts)
+            if not ((chooser_blocks == chooser_blocks[:, [0]]).all() and (alt_blocks == alt_blocks[0]).all()):
+                return None
+            if len(pd.unique(chooser_blocks[:, 0])) != num_choosers or len(pd.unique(alt_blocks[0])) != num_alts:
+                return None
+
+            # same row and column order as unstack: sorted by chooser and variable, with sorted alt columns
+            chooser_order = np.argsort(chooser_blocks[:, 0], kind='mergesort')
+            alt_order = np.argsort(alt_blocks[0], kind='mergesort')
+            variable_order = np.argsort(variables, kind='mergesort')
+
+            values = df[variables].to_numpy().reshape(num_choosers, num_alts, len(variables))
+            values = values[np.ix_(chooser_order, alt_order, variable_order)]
+            values = values.transpose(0, 2, 1).reshape(num_choosers * len(variables), num_alts)
+
+            index = pd.Index(np.repeat(chooser_blocks[chooser_order, 0], len(variables)), name=chooser_name)
+            columns = pd.Index(alt_blocks[0][alt_order], name=alt_id_name)
+            reshaped_df = pd.DataFrame(values, index=index, columns=columns)
+            reshaped_df.insert(0, variable_column, np.tile(np.asarray(variables)[variable_order], num_choosers))
+
+            return reshaped_df
+
+        melt_df = reshape_alternatives()
+        if melt_df is not None:
+            return melt_df
+
+        # no need to sort by chooser here, since unstack sorts the (chooser, variable) index anyway
         melt_df = pd.melt(df, id_vars=[chooser_name, alt_id_name]) \
-            .sort_values(by=chooser_name, kind='mergesort') \
             .rename(columns={'variable': variable_column})
 
         # person_id,alt_dest,expression,value
@@ -323,7 +381,7 @@ class Estimator(object):
 
         input_path = config.config_file_path(file_name)
         output_path = self.file_path(table_name=tag, file_type='csv')
-        shutil.copy(input_path, output_path)
+        shutil.copyfile(input_path, output_path)
         self.debug("estimate.write_spec: %s" % output_path)
 
 
@@ -464,17 +522,22 @@ class EstimationManager(object):
 
         logger.debug("get_survey_values: reindexing using %s.%s" % (table_name, survey_df_index_column))
 
-        values = pd.DataFrame(index=dest_index)
+        if survey_df_index_column == 'index':
+            survey_index = survey_df.index
+        else:
+            survey_index = pd.Index(survey_df[survey_df_index_column])
+
+        # locate the survey row of each dest_index value once, and gather all the columns by position
+        positions = survey_index.get_indexer(dest_index)
+        unmatched = (positions == -1)
+
+        values = {}
         for c in column_names:
-            if survey_df_index_column == 'index':
-                survey_values = survey_df[c]
-            else:
-                survey_values = pd.Series(survey_df[c].values, index=survey_df[survey_df_index_column])
 
-            survey_values = reindex(survey_values, dest_index)
+            survey_values = survey_df[c].values.take(positions)
 
             # shouldn't be any choices we can't override
-            missing_values = survey_values.isna()
+            missing_values = unmatched | pd.isna(survey_values)
             if missing_values.any():
                 logger.error("missing survey_values for %s\n%s" % (c, dest_index[missing_values]))
                 logger.error("couldn't get_survey_values for %s in %s\n" % (c, table_name))
@@ -482,7 +545,10 @@ class EstimationManager(object):
 
             values[c] = survey_values
 
-        return values[column_name] if column_name else values
+        if column_name:
+            return pd.Series(values[column_name], index=dest_index, name=column_name)
+
+        return pd.DataFrame(values, index=dest_index, columns=column_names)
 
     def join_survey_values(self, model_df, table_name, left_on, right_on):
 
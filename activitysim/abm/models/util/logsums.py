@@ -17,7 +17,8 @@ logger = logging.getLogger(__name__)
 
 def filter_chooser_columns(choosers, logsum_settings, model_settings):
 
-    chooser_columns = logsum_settings.get('LOGSUM_CHOOSER_COLUMNS', [])
+    # copy so we don't append to the list in logsum_settings
+    chooser_columns = list(logsum_settings.get('LOGSUM_CHOOSER_COLUMNS', []))
 
     if 'CHOOSER_ORIG_COL_NAME' in model_settings:
         chooser_columns.append(model_settings['CHOOSER_ORIG_COL_NAME'])
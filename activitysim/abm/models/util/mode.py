@@ -47,9 +47,9 @@ def mode_choice_simulate(
                             'choice': mode_column_name},
                    inplace=True)
 
+    # choices are alternative offsets into spec columns, so take the mode names by position
     alts = spec.columns
-    choices[mode_column_name] = \
-        choices[mode_column_name].map(dict(list(zip(list(range(len(alts))), alts))))
+    choices[mode_column_name] = alts.values.take(choices[mode_column_name].values)
 
     return choices
 
@@ -88,8 +88,9 @@ def run_tour_mode_choice_simulate(
     assert ('in_period' not in choosers) and ('out_period' not in choosers)
     in_time = skims['in_time_col_name']
     out_time = skims['out_time_col_name']
-    choosers['in_period'] = expressions.skim_time_period_label(choosers[in_time])
-    choosers['out_period'] = expressions.skim_time_period_label(choosers[out_time])
+    # categorical, since there are only a few period labels and every skim stack lookup factorizes these
+    choosers['in_period'] = expressions.skim_time_period_label(choosers[in_time]).astype('category')
+    choosers['out_period'] = expressions.skim_time_period_label(choosers[out_time]).astype('category')
 
     expressions.annotate_preprocessors(
         choosers, locals_dict, skims,
@@ -10,6 +10,8 @@ import pytest
 from .. import cdap
 
 from activitysim.core import simulate
+from activitysim.core import inject
+from activitysim.core import orca
 
 
 @pytest.fixture(scope='module')
@@ -105,6 +107,20 @@ def test_individual_utilities(people, cdap_indiv_and_hhsize1):
         individual_utils, expected, check_dtype=False, check_names=False)
 
 
+def test_add_interaction_column():
+
+    choosers = pd.DataFrame({
+        'ptype_p1': [1, 8, 4],
+        'ptype_p2': [2, 2, 4],
+        'ptype_p3': [8, 1, 3]})
+
+    cdap.add_interaction_column(choosers, (1, 3))
+    cdap.add_interaction_column(choosers, (1, 2, 3))
+
+    assert list(choosers['p1_p3']) == [18, 18, 34]
+    assert list(choosers['p1_p2_p3']) == [128, 128, 344]
+
+
 def test_build_cdap_spec_hhsize2(people, cdap_indiv_and_hhsize1, cdap_interaction_coefficients):
 
     hhsize = 2
@@ -128,3 +144,85 @@ def test_build_cdap_spec_hhsize2(people, cdap_indiv_and_hhsize1, cdap_interactio
         columns=['HH', 'HM', 'HN', 'MH', 'MM', 'MN', 'NH', 'NM', 'NN']).astype('float')
 
     pdt.assert_frame_equal(utils, expected, check_names=False)
+
+
+@pytest.fixture
+def spec_cache_settings():
+    """
+    Yield a function that installs a settings injectable and clears the cdap spec injectables,
+    and put back whatever injectables were there before afterwards, even if the test fails.
+    """
+
+    saved_injectables = {}
+
+    def save_injectable(name):
+        if name not in saved_injectables:
+            saved_injectables[name] = (name in orca._INJECTABLES, orca._INJECTABLES.get(name))
+
+    def set_spec_cache_settings(settings, hhsizes):
+        save_injectable('settings')
+        inject.add_injectable('settings', settings)
+        for hhsize in hhsizes:
+            save_injectable(cdap.cached_spec_name(hhsize))
+            inject.add_injectable(cdap.cached_spec_name(hhsize), None)
+
+    yield set_spec_cache_settings
+
+    for name, (existed, injectable) in saved_injectables.items():
+        if existed:
+            orca._INJECTABLES[name] = injectable
+        else:
+            inject.remove_injectable(name)
+
+
+def test_build_cdap_spec_disk_cache(tmpdir, cdap_interaction_coefficients, spec_cache_settings):
+
+    hhsize = 3
+
+    spec_cache_settings({'cdap_spec_cache_dir': str(tmpdir)}, [hhsize])
+
+    spec = cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize=hhsize, cache=True)
+
+    spec_cache_path = cdap.spec_cache_file_path(cdap_interaction_coefficients, hhsize)
+    assert os.path.isfile(spec_cache_path)
+
+    # clear injectable cache so spec is read from disk cache
+    inject.add_injectable(cdap.cached_spec_name(hhsize), None)
+    cached_spec = cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize=hhsize, cache=True)
+
+    pdt.assert_frame_equal(cached_spec, spec)
+
+    # different coefficients have a different cache file
+    coefficients = cdap_interaction_coefficients.copy()
+    coefficients['coefficient'] += 1
+    assert cdap.spec_cache_file_path(coefficients, hhsize) != spec_cache_path
+
+
+def test_build_cdap_spec_disk_cache_mismatch(tmpdir, cdap_interaction_coefficients, spec_cache_settings):
+
+    hhsize = 3
+
+    spec_cache_settings({'cdap_spec_cache_dir': str(tmpdir)}, [hhsize])
+
+    # a cached file that is not a spec for this hhsize is ignored and the spec is rebuilt
+    spec_cache_path = cdap.spec_cache_file_path(cdap_interaction_coefficients, hhsize)
+    cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize=2, cache=False).to_csv(spec_cache_path)
+
+    spec = cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize=hhsize, cache=True)
+
+    pdt.assert_frame_equal(spec, cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize, cache=False))
+    pdt.assert_frame_equal(cdap.read_spec_cache(spec_cache_path, hhsize), spec)
+
+
+def test_build_cdap_specs_parallel(cdap_interaction_coefficients, spec_cache_settings):
+
+    hhsizes = [2, 3]
+
+    spec_cache_settings({}, hhsizes)
+
+    cdap.build_cdap_specs_parallel(cdap_interaction_coefficients, hhsizes, max_workers=2)
+
+    for hhsize in hhsizes:
+        spec = cdap.get_cached_spec(hhsize)
+        assert spec is not None
+        pdt.assert_frame_equal(spec, cdap.build_cdap_spec(cdap_interaction_coefficients, hhsize, cache=False))
@@ -296,6 +296,58 @@ def test_mini_pipeline_run3():
     close_handlers()
 
 
+def test_location_choice_without_annotate_persons(tmpdir):
+
+    # location choice should still save its choice columns when there is no annotate_persons spec
+
+    model_names = ['school_location', 'workplace_location']
+    for model_name in model_names:
+        with open(os.path.join(example_path('configs'), '%s.yaml' % model_name)) as f:
+            model_settings = yaml.load(f, Loader=yaml.SafeLoader)
+        del model_settings['annotate_persons']
+        with open(os.path.join(str(tmpdir), '%s.yaml' % model_name), 'w') as f:
+            yaml.dump(model_settings, f)
+
+    setup_dirs(ancillary_configs_dir=str(tmpdir))
+    inject_settings(households_sample_size=HOUSEHOLDS_SAMPLE_SIZE)
+
+    _MODELS = [
+        'initialize_landuse',
+        'compute_accessibility',
+        'initialize_households',
+    ] + model_names
+
+    pipeline.run(models=_MODELS, resume_after=None)
+    pipeline.close_pipeline()
+    inject.clear_cache()
+
+    # reload persons from the workplace_location checkpoint
+    setup_dirs(ancillary_configs_dir=str(tmpdir))
+    inject_settings(households_sample_size=HOUSEHOLDS_SAMPLE_SIZE)
+    pipeline.open_pipeline('workplace_location')
+
+    persons = pipeline.get_table('persons')
+
+    for dest_column, logsum_column in [('school_taz', 'school_taz_logsum'),
+                                       ('workplace_taz', 'workplace_location_logsum')]:
+        assert dest_column in persons
+        assert logsum_column in persons
+
+        # non-choosers are backfilled with -1 destination and NaN logsum
+        no_dest = (persons[dest_column] == -1)
+        assert no_dest.any() and not no_dest.all()
+        assert (persons[dest_column][~no_dest] > 0).all()
+        npt.assert_array_equal(persons[logsum_column].isnull(), no_dest)
+
+    # annotate_persons expressions were not run
+    assert 'distance_to_school' not in persons
+    assert 'distance_to_work' not in persons
+
+    pipeline.close_pipeline()
+    inject.clear_cache()
+    close_handlers()
+
+
 def full_run(resume_after=None, chunk_size=0,
              households_sample_size=HOUSEHOLDS_SAMPLE_SIZE,
              trace_hh_id=None, trace_od=None, check_for_variability=None):
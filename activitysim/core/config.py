@@ -8,6 +8,12 @@ import sys
 import logging
 from activitysim.core import inject
 
+try:
+    # use the libyaml parser if pyyaml was built with it
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 """
@@ -268,7 +274,7 @@ def read_settings_file(file_name, mandatory=True):
                 logger.debug("read settings for %s from %s" % (file_name, file_path))
 
             with open(file_path) as f:
-                s = yaml.load(f, Loader=yaml.SafeLoader)
+                s = yaml.load(f, Loader=SafeLoader)
                 if s is None:
                     s = {}
 
@@ -281,16 +281,16 @@ def _interaction_sample(
         # FIXME return full alternative set rather than sample
         logger.info("Estimation mode for %s using unsampled alternatives" % (trace_label, ))
 
-        index_name = probs.index.name
-        choices_df = \
-            pd.melt(probs.reset_index(), id_vars=[index_name])\
-            .sort_values(by=index_name, kind='mergesort')\
-            .set_index(index_name)\
-            .rename(columns={'value': 'prob'})\
-            .drop(columns='variable')
-
-        choices_df['pick_count'] = 1
-        choices_df.insert(0, alt_col_name, np.tile(alternatives.index.values, len(choosers.index)))
+        # probs has a row per chooser and a column per alternative, so (with choosers in index order)
+        # a row-major ravel lists each chooser's alternatives together without melting and re-sorting
+        if not probs.index.is_monotonic_increasing:
+            probs = probs.take(np.argsort(probs.index.values, kind='mergesort'))
+
+        choices_df = pd.DataFrame({
+            alt_col_name: np.tile(alternatives.index.values, len(probs.index)),
+            'prob': probs.values.ravel(),
+            'pick_count': 1},
+            index=pd.Index(np.repeat(probs.index.values, alternative_count), name=probs.index.name))
 
         return choices_df
     else:
@@ -126,7 +126,7 @@ def eval_interaction_utilities(spec, df, locals_d, trace_label, trace_rows, esti
 
                 target = expr[:expr.index('@')]
                 rhs = expr[expr.index('@') + 1:]
-                v = to_series(eval(rhs, globals(), locals_d))
+                v = to_series(eval(simulate.compile_expression(rhs), globals(), locals_d))
 
                 # update locals to allows us to ref previously assigned targets
                 locals_d[target] = v
@@ -138,7 +138,7 @@ def eval_interaction_utilities(spec, df, locals_d, trace_label, trace_rows, esti
                 continue
 
             if expr.startswith('@'):
-                v = to_series(eval(expr[1:], globals(), locals_d))
+                v = to_series(eval(simulate.compile_expression(expr[1:]), globals(), locals_d))
             else:
                 v = df.eval(expr)
 
@@ -157,7 +157,11 @@ def eval_interaction_utilities(spec, df, locals_d, trace_label, trace_rows, esti
                 expression_values_df.insert(loc=len(expression_values_df.columns), column=label,
                                             value=v.values if isinstance(v, pd.Series) else v)
 
-            utilities.utility += (v * coefficient).astype('float')
+            if coefficient == 1:
+                # multiplying by 1 is exact, so skip the extra pass for (common) unit coefficients
+                utilities.utility += v.astype('float')
+            else:
+                utilities.utility += (v * coefficient).astype('float')
 
             if trace_eval_results is not None:
 
@@ -4,8 +4,10 @@
 from builtins import range
 
 import os
+import copy
 import logging
 from collections import OrderedDict
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
@@ -26,6 +28,18 @@ SPEC_EXPRESSION_NAME = 'Expression'
 SPEC_LABEL_NAME = 'Label'
 
 
+@lru_cache(maxsize=4096)
+def compile_expression(expression):
+    """
+    Compile a python expression (e.g. a spec '@' expression without its '@' prefix) for eval.
+
+    Spec expressions are evaluated for every chunk, segment, and shadow pricing iteration,
+    so we cache the compiled code object rather than having eval re-parse the string each time.
+    The cache is bounded, since model specs have at most a few thousand distinct expressions.
+    """
+    return compile(expression, '<string>', 'eval')
+
+
 def random_rows(df, n):
 
     # only sample if df has more than n rows
@@ -160,21 +174,12 @@ def spec_for_segment(model_settings, spec_id, segment_name, estimator):
     -------
     pandas.dataframe
         canonical spec file with expressions in index and single column with utility coefficients
-    """
-
-    spec = read_model_spec(file_name=model_settings[spec_id])
-    coefficients = read_model_coefficients(model_settings)
-
-    if len(spec.columns) > 1:
-        # if spec is segmented
-        spec = spec[[segment_name]]
-    else:
-        # otherwise we expect a single coefficient column
-        assert spec.columns[0] == 'coefficient'
 
-    spec = eval_coefficients(spec, coefficients, estimator)
+    Evaluated segment specs are cached by get_evaluated_spec, so repeated calls (e.g. for each
+    shadow pricing iteration) don't re-read the spec and coefficients files.
+    """
 
-    return spec
+    return get_evaluated_spec(model_settings, estimator, spec_id=spec_id, segment_name=segment_name)
 
 
 def read_model_coefficient_template(model_settings):
@@ -258,6 +263,8 @@ def eval_nest_coefficients(nest_spec, coefficients):
         assert ('value' in coefficients.columns)
         coefficients = coefficients['value'].to_dict()
 
+    # don't clobber input nest_spec (caller may evaluate it for several segments)
+    nest_spec = copy.deepcopy(nest_spec)
     replace_coefficients(nest_spec)
 
     return nest_spec
@@ -281,7 +288,7 @@ def eval_coefficients(spec, coefficients, estimator):
 
     # drop any rows with all zeros since they won't have any effect (0 marginal utility)
     # (do not drop rows in estimation mode as it may confuse the estimation package (e.g. larch)
-    zero_rows = (spec == 0).all(axis=1)
+    zero_rows = np.all(spec.values == 0, axis=1)
     if zero_rows.any():
         if estimator:
             logger.debug("keeping %s all-zero rows in SPEC" % (zero_rows.sum(),))
@@ -292,6 +299,83 @@ def eval_coefficients(spec, coefficients, estimator):
     return spec
 
 
+# evaluated specs keyed by (spec_path, spec_mtime, coefficients_path, coefficients_mtime, segment_name, estimating)
+EVALUATED_SPEC_CACHE_SIZE = 32
+_evaluated_spec_cache = OrderedDict()
+
+
+def get_evaluated_spec(model_settings, estimator=None, spec_id='SPEC', segment_name=None,
+                       return_coefficients=False):
+    """
+    Read model_settings[spec_id] spec and COEFFICIENTS file and return spec with evaluated coefficients
+
+    Evaluating coefficients is comparatively expensive and the result depends only on the
+    spec and coefficients files, so it is cached (keyed on the file paths and modification
+    times) and subsequent calls for the same files return a copy of the cached spec.
+
+    The cache holds at most EVALUATED_SPEC_CACHE_SIZE specs, discarding the least recently used.
+
+    Parameters
+    ----------
+    model_settings : dict
+        model settings with spec_id and 'COEFFICIENTS' file names
+    estimator : Estimator object or None
+        all-zero rows are only dropped if not estimating, so estimating is part of the cache key
+    spec_id : str
+        name of model_settings tag with spec file name
+    segment_name : str or None
+        if not None, select the segment_name column of a segmented (omnibus) spec
+    return_coefficients : bool
+        if True, also return the coefficients the spec was evaluated with
+        (e.g. so estimation writes the same coefficients the cached spec was built from)
+
+    Returns
+    -------
+    spec : pandas.DataFrame
+    coefficients : pandas.DataFrame
+        only if return_coefficients is True
+    """
+
+    spec_file_name = model_settings[spec_id]
+    if not spec_file_name.lower().endswith('.csv'):
+        spec_file_name = '%s.csv' % (spec_file_name,)
+    spec_path = config.config_file_path(spec_file_name)
+    coefficients_path = config.config_file_path(model_settings['COEFFICIENTS'])
+
+    key = (spec_path, os.path.getmtime(spec_path),
+           coefficients_path, os.path.getmtime(coefficients_path),
+           segment_name, bool(estimator))
+
+    cached = _evaluated_spec_cache.get(key)
+    if cached is None:
+        spec = read_model_spec(file_name=spec_file_name)
+        coefficients = read_model_coefficients(model_settings)
+
+        if segment_name is not None:
+            if len(spec.columns) > 1:
+                # if spec is segmented
+                spec = spec[[segment_name]]
+            else:
+                # otherwise we expect a single coefficient column
+                assert spec.columns[0] == 'coefficient'
+
+        spec = eval_coefficients(spec, coefficients, estimator)
+
+        _evaluated_spec_cache[key] = (spec, coefficients)
+        while len(_evaluated_spec_cache) > EVALUATED_SPEC_CACHE_SIZE:
+            _evaluated_spec_cache.popitem(last=False)
+    else:
+        logger.debug("get_evaluated_spec returning cached spec for %s" % spec_file_name)
+        _evaluated_spec_cache.move_to_end(key)
+        spec, coefficients = cached
+
+    # don't let caller clobber cached spec
+    if return_coefficients:
+        return spec.copy(), coefficients.copy()
+
+    return spec.copy()
+
+
 def eval_utilities(spec, choosers, locals_d=None, trace_label=None,
                    have_trace_targets=False, estimator=None, alt_col_name=None):
     """
@@ -355,7 +439,7 @@ def eval_utilities(spec, choosers, locals_d=None, trace_label=None,
     for i, expr in enumerate(exprs):
         try:
             if expr.startswith('@'):
-                expression_values[i] = eval(expr[1:], globals_dict, locals_dict)
+                expression_values[i] = eval(compile_expression(expr[1:]), globals_dict, locals_dict)
             else:
                 expression_values[i] = choosers.eval(expr)
         except Exception as err:
@@ -481,7 +565,7 @@ def eval_variables(exprs, df, locals_d=None):
     for expr in exprs:
         try:
             if expr.startswith('@'):
-                expr_values = to_array(eval(expr[1:], globals_dict, locals_dict))
+                expr_values = to_array(eval(compile_expression(expr[1:]), globals_dict, locals_dict))
             else:
                 expr_values = to_array(df.eval(expr))
             # read model spec should ensure uniqueness, otherwise we should uniquify
@@ -614,7 +698,9 @@ def compute_nested_exp_utilities(raw_utilities, nest_spec):
     nested_utilities : pandas.DataFrame
         Will have the index of `raw_utilities` and columns for exponentiated leaf and node utilities
     """
-    nested_utilities = pd.DataFrame(index=raw_utilities.index)
+    # build the columns as ndarrays and construct the DataFrame once at the end,
+    # rather than inserting (and then overwriting) a DataFrame column for every nest node
+    nested_utilities = {}
 
     for nest in logit.each_nest(nest_spec, post_order=True):
 
@@ -622,8 +708,7 @@ def compute_nested_exp_utilities(raw_utilities, nest_spec):
 
         if nest.is_leaf:
             # leaf_utility = raw_utility / nest.product_of_coefficients
-            nested_utilities[name] = \
-                raw_utilities[name].astype(float) / nest.product_of_coefficients
+            utility = raw_utilities[name].values.astype(float) / nest.product_of_coefficients
 
         else:
             # nest node
@@ -631,14 +716,15 @@ def compute_nested_exp_utilities(raw_utilities, nest_spec):
             # this will RuntimeWarning: divide by zero encountered in log
             # if all nest alternative utilities are zero
             # but the resulting inf will become 0 when exp is applied below
+            # (nansum skips nan like DataFrame.sum did)
             with np.errstate(divide='ignore'):
-                nested_utilities[name] = \
-                    nest.coefficient * np.log(nested_utilities[nest.alternatives].sum(axis=1))
+                utility = \
+                    nest.coefficient * np.log(np.nansum([nested_utilities[a] for a in nest.alternatives], axis=0))
 
         # exponentiate the utility
-        nested_utilities[name] = np.exp(nested_utilities[name])
+        nested_utilities[name] = np.exp(utility)
 
-    return nested_utilities
+    return pd.DataFrame(nested_utilities, index=raw_utilities.index)
 
 
 def compute_nested_probabilities(nested_exp_utilities, nest_spec, trace_label):
@@ -391,9 +391,14 @@ class SkimStack(object):
 
         self.touch(key)
 
-        # skim_indexes = dim3.map(skim_keys_to_indexes).astype('int')
-        # this should be faster than map
-        skim_indexes = np.vectorize(skim_keys_to_indexes.get)(dim3)
+        # there are only a handful of distinct dim3 keys (e.g. time periods), so map those to skim
+        # indexes and gather by factorized code rather than looking up the key of every row
+        dim3_codes, dim3_keys = pd.factorize(dim3)
+        if (dim3_codes < 0).any():
+            bad_rows = np.asanyarray(dim3_codes < 0).nonzero()[0]
+            raise RuntimeError("SkimStack lookup %s: missing dim3 key in %s rows (row offsets %s)" %
+                               (key, len(bad_rows), bad_rows[:10]))
+        skim_indexes = np.array([skim_keys_to_indexes[k] for k in dim3_keys], dtype=int)[dim3_codes]
 
         return stacked_skim_data[orig, dest, skim_indexes]
 
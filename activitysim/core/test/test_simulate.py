@@ -10,6 +10,7 @@ import pandas.testing as pdt
 import pytest
 
 from .. import inject
+from .. import orca
 
 from .. import simulate
 
@@ -36,6 +37,25 @@ def data(data_dir):
     return pd.read_csv(os.path.join(data_dir, 'data.csv'))
 
 
+@pytest.fixture
+def configs_dir(tmpdir):
+    """
+    Install tmpdir as the configs_dir injectable,
+    and put back whatever configs_dir was there before afterwards, even if the test fails.
+    """
+
+    existed, injectable = 'configs_dir' in orca._INJECTABLES, orca._INJECTABLES.get('configs_dir')
+
+    inject.add_injectable('configs_dir', str(tmpdir))
+
+    yield str(tmpdir)
+
+    if existed:
+        orca._INJECTABLES['configs_dir'] = injectable
+    else:
+        inject.remove_injectable('configs_dir')
+
+
 def test_read_model_spec(data_dir, spec_name):
 
     spec = simulate.read_model_spec(
@@ -87,3 +107,124 @@ def test_simple_simulate_chunked(data, spec):
     choices = simulate.simple_simulate(choosers=data, spec=spec, nest_spec=None, chunk_size=2)
     expected = pd.Series([1, 1, 1], index=data.index)
     pdt.assert_series_equal(choices, expected)
+
+
+def test_get_evaluated_spec(configs_dir):
+
+    spec_path = os.path.join(configs_dir, 'evaluated_spec.csv')
+    coefficients_path = os.path.join(configs_dir, 'evaluated_spec_coefficients.csv')
+
+    with open(spec_path, 'w') as f:
+        f.write("Description,Expression,alt0,alt1\n"
+                "first row,thing1 == 1,coef_one,0\n"
+                "zero row,thing1 == 2,0,0\n")
+    with open(coefficients_path, 'w') as f:
+        f.write("coefficient_name,value,constrain\ncoef_one,1.5,F\n")
+
+    model_settings = {'SPEC': 'evaluated_spec.csv', 'COEFFICIENTS': 'evaluated_spec_coefficients.csv'}
+
+    spec = simulate.get_evaluated_spec(model_settings)
+    assert list(spec.index) == ['thing1 == 1']
+    npt.assert_array_equal(spec.values, [[1.5, 0]])
+
+    # caller can't clobber cached spec
+    spec['alt0'] = 99
+    spec = simulate.get_evaluated_spec(model_settings)
+    npt.assert_array_equal(spec.values, [[1.5, 0]])
+
+    # all-zero rows are kept when estimating
+    spec = simulate.get_evaluated_spec(model_settings, estimator=True)
+    assert len(spec) == 2
+
+    # coefficients the cached spec was evaluated with
+    spec, coefficients = simulate.get_evaluated_spec(model_settings, estimator=True, return_coefficients=True)
+    assert len(spec) == 2
+    assert coefficients.value.to_dict() == {'coef_one': 1.5}
+
+    # modified coefficients file is re-read
+    with open(coefficients_path, 'w') as f:
+        f.write("coefficient_name,value,constrain\ncoef_one,2.5,F\n")
+    mtime = os.path.getmtime(coefficients_path) + 10
+    os.utime(coefficients_path, (mtime, mtime))
+
+    spec = simulate.get_evaluated_spec(model_settings)
+    npt.assert_array_equal(spec.values, [[2.5, 0]])
+
+
+def test_spec_for_segment(configs_dir):
+
+    spec_path = os.path.join(configs_dir, 'segmented_spec.csv')
+    coefficients_path = os.path.join(configs_dir, 'segmented_spec_coefficients.csv')
+
+    with open(spec_path, 'w') as f:
+        f.write("Description,Expression,work,school\n"
+                "first row,thing1 == 1,coef_one,0\n"
+                "second row,thing1 == 2,0,coef_two\n")
+    with open(coefficients_path, 'w') as f:
+        f.write("coefficient_name,value,constrain\ncoef_one,1.5,F\ncoef_two,2.5,F\n")
+
+    model_settings = {'SPEC': 'segmented_spec.csv', 'COEFFICIENTS': 'segmented_spec_coefficients.csv'}
+
+    spec = simulate.spec_for_segment(model_settings, spec_id='SPEC', segment_name='school', estimator=None)
+    assert list(spec.columns) == ['school']
+    assert list(spec.index) == ['thing1 == 2']
+    npt.assert_array_equal(spec.values, [[2.5]])
+
+    # segments are cached separately
+    spec = simulate.spec_for_segment(model_settings, spec_id='SPEC', segment_name='work', estimator=None)
+    assert list(spec.columns) == ['work']
+    npt.assert_array_equal(spec.values, [[1.5]])
+
+
+def test_eval_nest_coefficients():
+
+    nest_spec = {
+        'name': 'root',
+        'coefficient': 'coef_nest_root',
+        'alternatives': [
+            {'name': 'AUTO', 'coefficient': 'coef_nest_auto', 'alternatives': ['DRIVE', 'SHARED']},
+            'WALK']
+    }
+
+    nests = simulate.eval_nest_coefficients(nest_spec, {'coef_nest_root': 1.0, 'coef_nest_auto': 0.72})
+    assert nests['coefficient'] == 1.0
+    assert nests['alternatives'][0]['coefficient'] == 0.72
+
+    # input nest_spec is not clobbered, so it can be evaluated again with other coefficients
+    assert nest_spec['alternatives'][0]['coefficient'] == 'coef_nest_auto'
+    nests = simulate.eval_nest_coefficients(nest_spec, {'coef_nest_root': 1.0, 'coef_nest_auto': 0.5})
+    assert nests['alternatives'][0]['coefficient'] == 0.5
+
+
+def test_compute_nested_exp_utilities():
+
+    nest_spec = {
+        'name': 'root',
+        'coefficient': 1.0,
+        'alternatives': [
+            {'name': 'AUTO', 'coefficient': 0.5, 'alternatives': ['DRIVE', 'SHARED']},
+            'WALK']
+    }
+
+    raw_utilities = pd.DataFrame({'DRIVE': [1.0, -999.0], 'SHARED': [0.5, -999.0], 'WALK': [0.0, 0.0]},
+                                 index=[10, 20])
+
+    nested_exp_utilities = simulate.compute_nested_exp_utilities(raw_utilities, nest_spec)
+
+    assert list(nested_exp_utilities.columns) == ['DRIVE', 'SHARED', 'AUTO', 'WALK', 'root']
+    assert nested_exp_utilities.index.equals(raw_utilities.index)
+
+    # leaves are scaled by product of nest coefficients before exponentiation
+    npt.assert_allclose(nested_exp_utilities.DRIVE, np.exp(raw_utilities.DRIVE / 0.5))
+    auto = np.exp(0.5 * np.log(np.exp(raw_utilities.DRIVE / 0.5) + np.exp(raw_utilities.SHARED / 0.5)))
+    npt.assert_allclose(nested_exp_utilities.AUTO, auto)
+    npt.assert_allclose(nested_exp_utilities.root, auto + 1.0)
+
+
+def test_compile_expression():
+
+    code = simulate.compile_expression('df.a * 2')
+    assert simulate.compile_expression('df.a * 2') is code
+
+    df = pd.DataFrame({'a': [1, 2]})
+    npt.assert_array_equal(eval(code, {}, {'df': df}), [2, 4])
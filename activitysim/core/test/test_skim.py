@@ -110,7 +110,8 @@ def test_skims(data):
     )
 
 
-def test_3dskims(data):
+@pytest.fixture
+def skim_stack(data):
 
     skims_shape = data.shape + (2,)
 
@@ -124,9 +125,12 @@ def test_3dskims(data):
     }
     skim_dict = skim.SkimDict([skim_data], skim_info)
 
-    stack = skim.SkimStack(skim_dict)
+    return skim.SkimStack(skim_dict)
+
+
+def test_3dskims(skim_stack):
 
-    skims3d = stack.wrap(left_key="taz_l", right_key="taz_r", skim_key="period")
+    skims3d = skim_stack.wrap(left_key="taz_l", right_key="taz_r", skim_key="period")
 
     df = pd.DataFrame({
         "taz_l": [1, 9, 4],
@@ -144,3 +148,44 @@ def test_3dskims(data):
         ),
         check_dtype=False
     )
+
+
+def test_3dskims_categorical_period(skim_stack):
+
+    skims3d = skim_stack.wrap(left_key="taz_l", right_key="taz_r", skim_key="period")
+
+    # run_tour_mode_choice_simulate passes categorical in_period/out_period to SkimStack.lookup,
+    # and the categories can include periods with no rows
+    df = pd.DataFrame({
+        "taz_l": [1, 9, 4],
+        "taz_r": [2, 3, 7],
+        "period": pd.Categorical(["AM", "PM", "AM"], categories=["EA", "AM", "PM"], ordered=True)
+    })
+
+    skims3d.set_df(df)
+
+    pdt.assert_series_equal(
+        skims3d["SOV"],
+        pd.Series(
+            [12, 930, 47],
+            index=[0, 1, 2]
+        ),
+        check_dtype=False
+    )
+
+
+def test_3dskims_missing_period(skim_stack):
+
+    skims3d = skim_stack.wrap(left_key="taz_l", right_key="taz_r", skim_key="period")
+
+    df = pd.DataFrame({
+        "taz_l": [1, 9, 4],
+        "taz_r": [2, 3, 7],
+        "period": ["AM", np.nan, "PM"]
+    })
+
+    skims3d.set_df(df)
+
+    with pytest.raises(RuntimeError) as excinfo:
+        skims3d["SOV"]
+    assert "missing dim3 key" in str(excinfo.value)